@@ -1,3 +1,10 @@
+import hashlib
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from types import MappingProxyType
+
+import orjson
 from telegram.ext import (
     Application,
     CommandHandler,
@@ -9,6 +16,7 @@ from telegram.ext import (
     InlineKeyboardMarkup,  # Moved here
 )
 from telegram.constants import ParseMode
+from telegram.error import RetryAfter
 
 # Configure logging
 logging.basicConfig(
@@ -19,23 +27,30 @@ logger = logging.getLogger(__name__)
 # API Base URLs
 OPENF1_API = "https://api.openf1.org/v1"
 JOLPICA_API = "https://api.jolpi.ca/ergast/f1/"
+# Per-session OpenF1 URL templates (format with the session key)
+SESSION_RESULT_URL = OPENF1_API + "/session_result?session_key={}"
+RACE_CONTROL_URL = OPENF1_API + "/race_control?session_key={}&order_by=-date"
+POSITION_URL = OPENF1_API + "/position?session_key={}"
+LAPS_URL = OPENF1_API + "/laps?session_key={}"
+STINTS_URL = OPENF1_API + "/stints?session_key={}"
+INTERVALS_URL = OPENF1_API + "/intervals?session_key={}"
 # Community-maintained F1 calendar (raw JSON on GitHub) - now with dynamic year
 F1_CALENDAR_API_TEMPLATE = (
     "https://raw.githubusercontent.com/sportstimes/f1/main/_db/f1/{year}.json"
 )
 
 # Tyre compound emojis
-TYRE_COMPOUNDS = {
+TYRE_COMPOUNDS = MappingProxyType({
     "SOFT": "🔴 Soft",  # Red square
     "MEDIUM": "🟡 Medium",  # Yellow circle
     "HARD": "⚪ Hard",  # White circle
     "INTERMEDIATE": "🔵 Intermediate",  # Blue circle
     "WET": "🟢 Wet",  # Green circle
     "UNKNOWN": "⚫ Unknown",  # Black circle (Fallback)
-}
+})
 
 # Simple country to flag emoji map (limited set for F1 calendar)
-FLAG_EMOJIS = {
+FLAG_EMOJIS = MappingProxyType({
     "Bahrain": "🇧🇭",
     "Saudi Arabia": "🇸🇦",
     "Australia": "🇦🇺",
@@ -64,10 +79,221 @@ FLAG_EMOJIS = {
     "South Africa": "🇿🇦",
     "Korea": "🇰🇷",
     "India": "🇮🇳",
-}
+})
+
+# aiohttp already advertises gzip/deflate, plus br when Brotli is installed
+HTTP_HEADERS = {"User-Agent": "F1DashBot/1.0"}
+
+# Candidate OpenF1 endpoints for session events (overtakes, pits, retirements, DNF).
+# Only a few are actually served; get_session_events learns which ones respond.
+OPENF1_EVENT_ENDPOINTS = (
+    "overtakes",
+    "overtake",
+    "events",
+    "incidents",
+    "race_events",
+    "pit_stops",
+    "pitstops",
+    "pit_stop",
+    "retirements",
+    "dnf",
+    "pit",  # For pit stops
+    # session_result is not probed here: commentary_loop reads DNFs from the
+    # cached get_session_result
+)
+# Re-probe endpoints that did not respond once per hour (seconds)
+EVENT_ENDPOINT_REPROBE_INTERVAL = 3600
+# ...or every 10 minutes while none of them is served
+EVENT_ENDPOINT_EMPTY_REPROBE = 600
+# Max event endpoint requests in flight at once
+EVENT_PROBE_CONCURRENCY = 8
+
+# Cache TTLs (seconds) for the OpenF1 fetchers. Volatile data gets a
+# (unknown, live, idle) tier so it is fresh during a session and rarely
+# refetched once the session is over.
+RACE_CONTROL_TTL = 30  # Used until the session state is known
+RACE_CONTROL_LIVE_TTL = 5
+RACE_CONTROL_IDLE_TTL = 1800
+SESSION_RESULT_TTL = 30
+SESSION_RESULT_LIVE_TTL = 30
+# Penalties and DSQs still change the classification after the chequered flag;
+# revalidation is a cheap conditional GET
+SESSION_RESULT_IDLE_TTL = 300
+INTERVALS_TTL = 15
+INTERVALS_LIVE_TTL = 5
+INTERVALS_IDLE_TTL = 3600
+POSITIONS_TTL = 10
+LAP_TIMES_TTL = 10
+STINTS_TTL = 10
+
+# Keys remembered per chat; grows to the poll size when a feed is larger
+COMMENTARY_SEEN_MAX = 2000
+
+# Commentary text patterns
+_DRNUM_RE = re.compile(r"DR?(\d{1,2})")
+_DR_CODE_RE = re.compile(r"DR(\d{1,2})")
+# Session result statuses that mean the driver is out of the race
+_DNF_STATUS_RE = re.compile(r"dnf|retired", re.IGNORECASE)
+
+# Telegram send pacing: global concurrency cap and per-chat rate (messages/second)
+TELEGRAM_MAX_CONCURRENT_SENDS = 29
+TELEGRAM_CHAT_RATE = 1.0
+
+# Keep batched commentary comfortably under Telegram's 4096-character limit
+COMMENTARY_BATCH_LIMIT = 3800
+
+# Retry delay after a failed dashboard update: doubles per failure up to the cap
+UPDATE_BACKOFF_MIN = 5.0
+UPDATE_BACKOFF_MAX = 120.0
+
+# Replay cadence of the demo simulation (seconds per lap)
+SIM_LAP_INTERVAL = 2.0
+
+# Static message fragments reused by the formatters
+PODIUM_EMOJIS = ("  ", "🥇", "🥈", "🥉")  # Indexed by finishing position
+DIVIDER = "━━━━━━━━━━━━━━━━━━━━"
+GAP_UNKNOWN = "+?.???"  # Shown when OpenF1 has no interval for a driver
+DASHBOARD_TITLE = "🏎️ <b>F1 Live Dashboard</b>"
+RACE_CONTROL_HEADER = "⚠️ <b>Race Control Messages</b>"
+RACE_CONTROL_EMPTY = "⚠️ <b>Race Control</b>\n━━━━━━━━━━━━━━━━\n<i>No recent messages</i>"
+
+# Inline keyboards attached to every dashboard refresh (fixed buttons, built once)
+LIVE_KEYBOARD = InlineKeyboardMarkup(
+    [
+        [
+            InlineKeyboardButton("⏹️ Stop Updates", callback_data="stop"),
+            InlineKeyboardButton("💬 Commentary", callback_data="commentary"),
+        ],
+        [InlineKeyboardButton("🗓️ Weekend Schedule", callback_data="schedule")],
+    ]
+)
+SIM_KEYBOARD = InlineKeyboardMarkup(
+    [
+        [
+            InlineKeyboardButton("⏹️ Stop Updates", callback_data="stop"),
+            InlineKeyboardButton("💬 Commentary", callback_data="commentary"),
+        ],
+    ]
+)
 
 # Baku, Azerbaijan Timezone Offset (UTC+4)
 BAKU_TIME_OFFSET = timedelta(hours=4)
+BAKU_TZ = timezone(BAKU_TIME_OFFSET)
+
+
+@lru_cache(maxsize=1024)
+def _lap_to_sec(time_str: str) -> float:
+    """Convert an "M:SS.sss" lap time string to seconds (99999.0 if unparseable)."""
+    try:
+        i = time_str.find(":")
+        if i < 0:
+            return float(time_str)
+        return float(time_str[:i]) * 60 + float(time_str[i + 1 :])
+    except (AttributeError, ValueError):
+        return 99999.0
+
+
+def _position_key(pos: Dict) -> int:
+    """Sort key for position frames; missing or null positions sort last."""
+    position = pos.get("position")
+    return position if isinstance(position, int) else 999
+
+
+@lru_cache(maxsize=256)
+def _format_rc_entry(category: str, message: str, flag: str, date: str) -> str:
+    """Format one race control message; the same few are re-rendered every tick."""
+    flag = flag.upper()
+    flag_emoji = ""
+    if "YELLOW" in flag:
+        flag_emoji = "🟨"
+    elif "RED" in flag:
+        flag_emoji = "🟥"
+    elif "GREEN" in flag:
+        flag_emoji = "🟩"
+    elif "CHEQUERED" in flag or "CHECKERED" in flag:
+        flag_emoji = "🏁"
+
+    entry = f"{flag_emoji} <b>{category}</b>: {message}"
+    if date:
+        entry += f"\n   <i>{date[:19].replace('T', ' ')} UTC</i>"
+    return entry
+
+
+def _format_gap(gap: Union[int, float, str]) -> str:
+    """Render an OpenF1 gap_to_leader value (seconds, or a string like "+1 LAP")."""
+    if isinstance(gap, (int, float)):
+        return f"+{float(gap):.3f}"
+    return str(gap)
+
+
+def _format_lap_times(lap_times: "pd.Series") -> List[str]:
+    """Format a FastF1 LapTime column as "M:SS.sss" strings (missing -> 1:31.000)."""
+    ms = (lap_times.dt.total_seconds() * 1000).round()
+    minutes, rem = divmod(ms, 60000)
+    seconds, millis = divmod(rem, 1000)
+    return [
+        "1:31.000" if pd.isna(m) else f"{int(m)}:{int(s):02d}.{int(x):03d}"
+        for m, s, x in zip(minutes, seconds, millis)
+    ]
+
+
+def _commentary_key(item: Dict) -> str:
+    """Short, stable content hash of an API item for commentary de-duplication."""
+    payload = orjson.dumps(item, option=orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+def _rc_key(msg: Dict) -> Hashable:
+    """De-duplication key for a race control message from its identifying fields."""
+    key = (
+        msg.get("date"),
+        msg.get("driver_number"),
+        msg.get("category"),
+        msg.get("flag"),
+        msg.get("message"),
+    )
+    if any(isinstance(v, (dict, list)) for v in key):
+        return _commentary_key(msg)
+    return key
+
+
+def _event_key(ev: Dict) -> Hashable:
+    """De-duplication key for a session event: its typed API id, else a hash.
+
+    Events from all endpoints share one list, so a bare id is only unique
+    together with the event type.
+    """
+    ev_id = ev.get("id")
+    ev_type = ev.get("type") or ev.get("event")
+    if ev_type and isinstance(ev_id, (int, str)):
+        return (ev_type, ev_id)
+    return _commentary_key(ev)
+
+
+class TokenBucket:
+    """Minimal async token bucket used to pace Telegram sends to a single chat."""
+
+    __slots__ = ("rate", "capacity", "_tokens", "_updated", "_lock")
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity, self._tokens + (now - self._updated) * self.rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
 
 
 class F1LiveDashboard:
@@ -80,7 +306,10 @@ class F1LiveDashboard:
         self.live_messages: Dict[int, int] = {}
         self.update_tasks: Dict[int, asyncio.Task] = {}
         self.commentary_tasks: Dict[int, asyncio.Task] = {}
-        self.commentary_seen: Dict[int, Set[str]] = {}
+        # Per-chat LRU of commentary keys already sent (bounded by COMMENTARY_SEEN_MAX)
+        self.commentary_seen: Dict[int, "OrderedDict[Hashable, None]"] = {}
+        # Session whose commentary each chat's seen keys belong to
+        self.commentary_session: Dict[int, int] = {}
         # Per-chat auto-commentary preference
         self.auto_commentary: Set[int] = set()
 
@@ -88,267 +317,429 @@ class F1LiveDashboard:
         self.user_favorites: Dict[int, int] = {}
         self.subscribed_chats: Set[int] = set()
 
+        # Telegram send pacing (created lazily inside the running loop)
+        self.rate_buckets: Dict[int, TokenBucket] = {}
+        self._telegram_semaphore: Optional[asyncio.Semaphore] = None
+
         # Cache storage
-        self.race_control_cache: Dict[int, List[Dict]] = {}
+        self._cache: Dict[str, Tuple[float, Any]] = {}  # key -> (fetched_at, value)
+        self._inflight: Dict[str, "asyncio.Future[Any]"] = {}
+        # key -> conditional request headers (If-None-Match / If-Modified-Since)
+        self._validators: Dict[str, Dict[str, str]] = {}
         self.standings_cache: Optional[List[Dict]] = None
         self.historical_data_cache: Dict[str, Dict] = {}
         self.dynamic_driver_abbr: Dict[int, str] = {}
-        self.session_result_cache: Dict[int, List[Dict]] = {}  # New: for DNF/status
+        # Event endpoints that answered the last probe in get_session_events
+        self._known_event_endpoints: Optional[Set[str]] = None
+        self._last_event_probe: float = 0.0
+        self._event_probe_semaphore: Optional[asyncio.Semaphore] = None
 
         # Cache timestamps
-        self.last_rc_fetch: Optional[datetime] = None
         self.last_lineup_fetch: Optional[datetime] = None
         self.last_standings_fetch: Optional[datetime] = None
         self.last_schedule_fetch: Optional[datetime] = None
         self.last_session_fetch: Optional[datetime] = None
-        self.last_session_result_fetch: Optional[datetime] = None  # New
+        self.session_info_cache: Optional[Dict] = None
         # Calendar cache
         self.calendar_cache: Optional[Dict] = None
         self.last_calendar_fetch: Optional[datetime] = None
-        # Intervals cache for gaps
-        self.intervals_cache: Dict[int, Dict[int, str]] = {}
-        self.last_intervals_fetch: Optional[datetime] = None
 
     @property
     def session(self) -> aiohttp.ClientSession:
-        if not self._session or not isinstance(self._session, aiohttp.ClientSession):
-            self._session = aiohttp.ClientSession()
+        if self._session is None or self._session.closed:
+            # Keep-alive pool with DNS caching so repeated API calls reuse connections
+            connector = aiohttp.TCPConnector(
+                limit=100,
+                limit_per_host=20,
+                ttl_dns_cache=300,
+                keepalive_timeout=75,
+                enable_cleanup_closed=True,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=15, connect=5),
+                headers=HTTP_HEADERS,
+            )
         return self._session
 
+    @property
+    def event_probe_semaphore(self) -> asyncio.Semaphore:
+        if self._event_probe_semaphore is None:
+            self._event_probe_semaphore = asyncio.Semaphore(EVENT_PROBE_CONCURRENCY)
+        return self._event_probe_semaphore
+
+    @property
+    def telegram_semaphore(self) -> asyncio.Semaphore:
+        if self._telegram_semaphore is None:
+            self._telegram_semaphore = asyncio.Semaphore(TELEGRAM_MAX_CONCURRENT_SENDS)
+        return self._telegram_semaphore
+
+    async def close_session(self):
+        """Close the shared HTTP session (call on application shutdown)."""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def start_commentary(self, chat_id: int, session_key: int) -> None:
+        """Track commentary for a chat, forgetting keys seen in an earlier session."""
+        if self.commentary_session.get(chat_id) != session_key:
+            self.commentary_session[chat_id] = session_key
+            self.commentary_seen[chat_id] = OrderedDict()
+        else:
+            self.commentary_seen.setdefault(chat_id, OrderedDict())
+
+    def mark_commentary_seen(
+        self, chat_id: int, key: Hashable, cap: int = COMMENTARY_SEEN_MAX
+    ) -> bool:
+        """Record a commentary key for a chat; returns False if it was already sent.
+
+        Keys touched by the current poll sit at the end of the LRU, so a cap of at
+        least the poll size never evicts an item the same poll returned.
+        """
+        seen = self.commentary_seen.setdefault(chat_id, OrderedDict())
+        if key in seen:
+            seen.move_to_end(key)
+            return False
+        seen[key] = None
+        if len(seen) > cap:
+            seen.popitem(last=False)
+        return True
+
+    @staticmethod
+    async def _json(resp: aiohttp.ClientResponse) -> Any:
+        """Decode a response body with orjson (ignores the Content-Type header)."""
+        return orjson.loads(await resp.read())
+
+    async def _cached_get(
+        self,
+        key: str,
+        ttl: float,
+        url: str,
+        parse: Optional[Callable[[Any], Any]] = None,
+        conditional: bool = False,
+    ) -> Any:
+        """Return the cached value for key if it is younger than ttl, else refetch url.
+
+        With conditional=True the request carries the last ETag/Last-Modified
+        validators, and a 304 reply keeps the cached value without downloading
+        or parsing the body again.
+        Concurrent misses for the same key share a single request.
+        """
+        ts, val = self._cache.get(key, (0.0, None))
+        if val and time.monotonic() - ts < ttl:
+            return val
+        pending = self._inflight.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(
+                self._refresh(key, url, val, parse, conditional)
+            )
+            self._inflight[key] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(key, None))
+        # Shield so one cancelled caller does not abort the fetch for the others
+        return await asyncio.shield(pending)
+
+    async def _refresh(
+        self,
+        key: str,
+        url: str,
+        val: Any,
+        parse: Optional[Callable[[Any], Any]],
+        conditional: bool,
+    ) -> Any:
+        headers = self._validators.get(key) if conditional and val else None
+        async with self.session.get(url, headers=headers) as resp:
+            if resp.status == 304:
+                self._cache[key] = (time.monotonic(), val)
+            elif resp.status == 200:
+                data = await self._json(resp)
+                val = parse(data) if parse else data
+                self._cache[key] = (time.monotonic(), val)
+                if conditional:
+                    self._store_validators(key, resp.headers)
+        return val
+
+    def _store_validators(self, key: str, resp_headers: Mapping[str, str]) -> None:
+        """Remember ETag/Last-Modified so the next refresh can be revalidated."""
+        validators = {}
+        if "ETag" in resp_headers:
+            validators["If-None-Match"] = resp_headers["ETag"]
+        if "Last-Modified" in resp_headers:
+            validators["If-Modified-Since"] = resp_headers["Last-Modified"]
+        if validators:
+            self._validators[key] = validators
+        else:
+            self._validators.pop(key, None)
+
     async def get_session_result(self, session_key: int) -> List[Dict]:
         """Fetches session results including status (DNF, etc.) from OpenF1."""
-        if (
-            not self.session_result_cache.get(session_key)
-            or not self.last_session_result_fetch
-            or (datetime.now() - self.last_session_result_fetch).total_seconds() > 30
-        ):
-            try:
-                url = f"{OPENF1_API}/session_result?session_key={session_key}"
-                async with self.session.get(url) as resp:
-                    if resp.status == 200:
-                        results = await resp.json()
-                        self.session_result_cache[session_key] = results
-                        self.last_session_result_fetch = datetime.now()
-            except Exception as e:
-                logger.error(f"Error fetching session results: {e}")
-                return []
-        return self.session_result_cache.get(session_key, [])
+        try:
+            url = SESSION_RESULT_URL.format(session_key)
+            results = await self._cached_get(
+                f"session_result:{session_key}",
+                self._tiered_ttl(
+                    session_key,
+                    SESSION_RESULT_TTL,
+                    SESSION_RESULT_LIVE_TTL,
+                    SESSION_RESULT_IDLE_TTL,
+                ),
+                url,
+                conditional=True,
+            )
+        except Exception as e:
+            logger.error(f"Error fetching session results: {e}")
+            return []
+        return results or []
+
+    def _tiered_ttl(self, session_key: int, unknown: int, live: int, idle: int) -> int:
+        """Pick a TTL by session state: short while live, long once it is over.
+
+        Only the cached session's own state is known; other sessions get `unknown`.
+        """
+        info = self.session_info_cache
+        if info is None or info.get("session_key") != session_key:
+            return unknown
+        return live if self.is_session_live(info) else idle
 
     async def get_race_control(self, session_key: int) -> List[Dict]:
         """Fetches race control messages from OpenF1."""
-        if (
-            not self.race_control_cache.get(session_key)
-            or not self.last_rc_fetch
-            or (datetime.now() - self.last_rc_fetch).total_seconds() > 30
-        ):
-            try:
-                url = f"{OPENF1_API}/race_control?session_key={session_key}&order_by=-date"
-                async with self.session.get(url) as resp:
-                    if resp.status == 200:
-                        messages = await resp.json()
-                        self.race_control_cache[session_key] = messages
-                        self.last_rc_fetch = datetime.now()
-            except Exception as e:
-                logger.error(f"Error fetching race control messages: {e}")
-                return []
-        return self.race_control_cache.get(session_key, [])
+        try:
+            url = RACE_CONTROL_URL.format(session_key)
+            messages = await self._cached_get(
+                f"race_control:{session_key}",
+                self._tiered_ttl(
+                    session_key,
+                    RACE_CONTROL_TTL,
+                    RACE_CONTROL_LIVE_TTL,
+                    RACE_CONTROL_IDLE_TTL,
+                ),
+                url,
+                conditional=True,
+            )
+        except Exception as e:
+            logger.error(f"Error fetching race control messages: {e}")
+            return []
+        return messages or []
+
+    async def _fetch_endpoint(self, ep: str, session_key: int) -> Optional[List[Dict]]:
+        """Fetch a single OpenF1 event endpoint and unwrap it into a list of events.
+
+        Returns None if the endpoint is not served (404/410), so callers can tell
+        it apart from an endpoint that exists but has no events yet. Network
+        errors and other error statuses (429 rate limiting, 5xx) are raised so a
+        transient failure is not mistaken for a missing endpoint.
+        """
+        try:
+            url = f"{OPENF1_API}/{ep}?session_key={session_key}"
+            async with self.session.get(url) as resp:
+                if resp.status in (404, 410):
+                    return None
+                resp.raise_for_status()
+                try:
+                    data = await self._json(resp)
+                except orjson.JSONDecodeError:
+                    data = None
+
+                if not data:
+                    return []
+
+                # If endpoint returns a list directly
+                if isinstance(data, list):
+                    return data
+                # If returns dict with top-level list
+                if isinstance(data, dict):
+                    # Try common keys
+                    for k in (
+                        "events",
+                        "overtakes",
+                        "items",
+                        "data",
+                        "results",
+                    ):
+                        if isinstance(data.get(k), list):
+                            return data.get(k)
+                    # If dict looks like a single event, append
+                    return [data]
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            raise
+        except Exception as e:
+            logger.debug(f"Endpoint {ep} not available or failed: {e}")
+        return None
 
     async def get_session_events(self, session_key: int) -> List[Dict]:
         """Try several possible endpoints to fetch session event data (overtakes, pitstops, retirements, DNF)."""
-        endpoints = [
-            "overtakes",
-            "overtake",
-            "events",
-            "incidents",
-            "race_events",
-            "pit_stops",
-            "pitstops",
-            "pit_stop",
-            "retirements",
-            "dnf",
-            "pit",  # For pit stops
-            "session_result",  # New: for DNF/status
-        ]
+        now = time.monotonic()
+        known = self._known_event_endpoints
+        reprobe_after = (
+            EVENT_ENDPOINT_REPROBE_INTERVAL if known else EVENT_ENDPOINT_EMPTY_REPROBE
+        )
+        probing = known is None or now - self._last_event_probe > reprobe_after
+        if probing:
+            endpoints = list(OPENF1_EVENT_ENDPOINTS)
+        else:
+            endpoints = [
+                ep for ep in OPENF1_EVENT_ENDPOINTS if ep in self._known_event_endpoints
+            ]
 
-        collected: List[Dict] = []
-        for ep in endpoints:
-            try:
-                url = f"{OPENF1_API}/{ep}?session_key={session_key}"
-                async with self.session.get(url) as resp:
-                    if resp.status == 200:
-                        try:
-                            data = await resp.json()
-                        except Exception:
-                            text = await resp.text()
-                            try:
-                                data = json.loads(text)
-                            except Exception:
-                                data = None
-
-                        if not data:
-                            continue
+        async def fetch(ep: str) -> Optional[List[Dict]]:
+            async with self.event_probe_semaphore:
+                return await self._fetch_endpoint(ep, session_key)
 
-                        # If endpoint returns a list directly
-                        if isinstance(data, list):
-                            collected.extend(data)
-                        # If returns dict with top-level list
-                        elif isinstance(data, dict):
-                            # Try common keys
-                            for k in (
-                                "events",
-                                "overtakes",
-                                "items",
-                                "data",
-                                "results",
-                            ):
-                                if isinstance(data.get(k), list):
-                                    collected.extend(data.get(k))
-                                    break
-                            else:
-                                # If dict looks like a single event, append
-                                if data:
-                                    collected.append(data)
-            except Exception as e:
-                logger.debug(f"Endpoint {ep} not available or failed: {e}")
+        results = await asyncio.gather(
+            *(fetch(ep) for ep in endpoints), return_exceptions=True
+        )
+
+        if probing:
+            known = {ep for ep, r in zip(endpoints, results) if isinstance(r, list)}
+            # An empty answer is only trusted if every endpoint actually replied;
+            # after network errors probe again on the next tick
+            if known or not any(isinstance(r, Exception) for r in results):
+                self._known_event_endpoints = known
+                self._last_event_probe = now
 
+        collected: List[Dict] = [
+            item for r in results if isinstance(r, list) for item in r
+        ]
         return collected
 
-    # ... (other methods remain the same, like init_session, close_session, is_session_live, get_live_driver_lineup, etc.)
+    # ... (other methods remain the same, like init_session, is_session_live, get_live_driver_lineup, etc.)
 
     async def get_live_timing(self, session_key: int) -> List[Dict]:
         """Fetches the latest position and status for all drivers in the session."""
+
+        def parse(positions: List[Dict]) -> List[Dict]:
+            driver_positions = {}
+            # Frames are chronological; scan backwards to keep each driver's latest
+            for pos in reversed(positions):
+                driver_num = pos.get("driver_number")
+                if driver_num:
+                    driver_positions.setdefault(driver_num, pos)
+            return sorted(driver_positions.values(), key=_position_key)
+
         try:
-            url = f"{OPENF1_API}/position?session_key={session_key}"
-            async with self.session.get(url) as resp:
-                if resp.status == 200:
-                    positions = await resp.json()
-                    driver_positions = {}
-                    for pos in positions:
-                        driver_num = pos.get("driver_number")
-                        if driver_num and driver_num not in driver_positions:
-                            driver_positions[driver_num] = pos
-
-                    sorted_positions = sorted(
-                        driver_positions.values(), key=lambda x: x.get("position", 999)
-                    )
-                    return sorted_positions
+            url = POSITION_URL.format(session_key)
+            positions = await self._cached_get(
+                f"position:{session_key}", POSITIONS_TTL, url, parse, conditional=True
+            )
         except Exception as e:
             logger.error(f"Error fetching live timing: {e}")
-        return []
+            return []
+        return positions or []
 
     async def get_lap_times(self, session_key: int) -> Dict[int, str]:
         """Get the latest completed lap time for each driver."""
+
+        def parse(laps: List[Dict]) -> Dict[int, str]:
+            driver_laps = {}
+            # Laps are returned oldest first; scan backwards so the
+            # first hit per driver is their latest lap
+            for lap in reversed(laps):
+                driver_num = lap.get("driver_number")
+                if not driver_num or driver_num in driver_laps:
+                    continue
+                lap_duration = lap.get("lap_duration")
+                if lap_duration:
+                    ms = int(round(lap_duration * 1000))
+                    minutes, rem = divmod(ms, 60000)
+                    seconds, ms = divmod(rem, 1000)
+                    driver_laps[driver_num] = f"{minutes}:{seconds:02d}.{ms:03d}"
+            return driver_laps
+
         try:
-            url = f"{OPENF1_API}/laps?session_key={session_key}"
-            async with self.session.get(url) as resp:
-                if resp.status == 200:
-                    laps = await resp.json()
-                    driver_laps = {}
-                    for lap in laps:
-                        driver_num = lap.get("driver_number")
-                        lap_duration = lap.get("lap_duration")
-                        if (
-                            driver_num
-                            and lap_duration
-                            and driver_num not in driver_laps
-                        ):
-                            minutes = int(lap_duration // 60)
-                            seconds = lap_duration % 60
-                            lap_time = f"{minutes}:{seconds:06.3f}"
-                            driver_laps[driver_num] = lap_time
-                    return driver_laps
+            url = LAPS_URL.format(session_key)
+            lap_times = await self._cached_get(
+                f"laps:{session_key}", LAP_TIMES_TTL, url, parse
+            )
         except Exception as e:
             logger.error(f"Error fetching lap times: {e}")
-        return {}
+            return {}
+        return lap_times or {}
 
     async def get_stints(self, session_key: int) -> Dict[int, str]:
         """Get the current tyre compound for each driver (latest stint)."""
+
+        def parse(stints: List[Dict]) -> Dict[int, str]:
+            driver_stints = {}
+            # Stints are listed oldest first; scan backwards to keep the current one
+            for stint in reversed(stints):
+                driver_num = stint.get("driver_number")
+                compound = stint.get("compound", "UNKNOWN")
+                if driver_num and driver_num not in driver_stints:
+                    driver_stints[driver_num] = compound.upper()
+            return driver_stints
+
         try:
-            url = f"{OPENF1_API}/stints?session_key={session_key}"
-            async with self.session.get(url) as resp:
-                if resp.status == 200:
-                    stints = await resp.json()
-                    driver_stints = {}
-                    for stint in stints:
-                        driver_num = stint.get("driver_number")
-                        compound = stint.get("compound", "UNKNOWN")
-                        if driver_num and driver_num not in driver_stints:
-                            driver_stints[driver_num] = compound.upper()
-                    return driver_stints
+            url = STINTS_URL.format(session_key)
+            tyres = await self._cached_get(
+                f"stints:{session_key}", STINTS_TTL, url, parse
+            )
         except Exception as e:
             logger.error(f"Error fetching stints: {e}")
-        return {}
+            return {}
+        return tyres or {}
 
     async def get_intervals(self, session_key: int) -> Dict[int, str]:
         """Get the latest intervals (gaps) for each driver."""
-        if (
-            not self.intervals_cache.get(session_key)
-            or not self.last_intervals_fetch
-            or (datetime.now() - self.last_intervals_fetch).total_seconds() > 15
-        ):
-            try:
-                url = f"{OPENF1_API}/intervals?session_key={session_key}"
-                async with self.session.get(url) as resp:
-                    if resp.status == 200:
-                        intervals = await resp.json()
-                        driver_intervals = {}
-                        for inter in intervals:
-                            driver_num = inter.get("driver_number")
-                            gap = inter.get("gap_to_leader")
-                            if (
-                                driver_num
-                                and gap
-                                and driver_num not in driver_intervals
-                            ):
-                                driver_intervals[driver_num] = gap
-                        self.intervals_cache[session_key] = driver_intervals
-                        self.last_intervals_fetch = datetime.now()
-            except Exception as e:
-                logger.error(f"Error fetching intervals: {e}")
-                return {}
-        return self.intervals_cache.get(session_key, {})
 
-    async def get_fastest_lap(self, session_key: int) -> Optional[Dict]:
-        """Determines the current fastest lap based on lap times."""
-        try:
-            lap_times = await self.get_lap_times(session_key)
-            if not lap_times:
-                return None
+        def parse(intervals: List[Dict]) -> Dict[int, str]:
+            driver_intervals = {}
+            # Samples are chronological; scan backwards to keep each driver's latest
+            for inter in reversed(intervals):
+                driver_num = inter.get("driver_number")
+                gap = inter.get("gap_to_leader")
+                if driver_num and gap:
+                    driver_intervals.setdefault(driver_num, gap)
+            return driver_intervals
 
-            def time_to_seconds(time_str):
-                try:
-                    m, s = map(float, time_str.split(":"))
-                    return m * 60 + s
-                except:
-                    return 99999.0
-
-            valid_times = [
-                time_to_seconds(t)
-                for t in lap_times.values()
-                if time_to_seconds(t) < 99999.0
-            ]
-            if not valid_times:
-                return None
-
-            fastest_time_seconds = min(valid_times)
-
-            fastest_lap_driver_num = next(
-                (
-                    d_num
-                    for d_num, t_str in lap_times.items()
-                    if math.isclose(
-                        time_to_seconds(t_str), fastest_time_seconds, rel_tol=1e-9
-                    )
+        try:
+            url = INTERVALS_URL.format(session_key)
+            driver_intervals = await self._cached_get(
+                f"intervals:{session_key}",
+                self._tiered_ttl(
+                    session_key, INTERVALS_TTL, INTERVALS_LIVE_TTL, INTERVALS_IDLE_TTL
                 ),
-                None,
+                url,
+                parse,
             )
+        except Exception as e:
+            logger.error(f"Error fetching intervals: {e}")
+            return {}
+        return driver_intervals or {}
+
+    async def get_live_bundle(
+        self, session_key: int
+    ) -> Tuple[Dict[int, str], Dict[int, str], Dict[int, str]]:
+        """Fetch lap times, tyre stints and intervals together for a dashboard tick."""
+        return await asyncio.gather(
+            self.get_lap_times(session_key),
+            self.get_stints(session_key),
+            self.get_intervals(session_key),
+        )
 
-            if fastest_lap_driver_num:
-                return {
-                    "driver_number": fastest_lap_driver_num,
-                    "lap_time": lap_times[fastest_lap_driver_num],
-                }
+    @staticmethod
+    def fastest_lap_from_times(lap_times: Dict[int, str]) -> Optional[Dict]:
+        """Determines the current fastest lap from an already-fetched lap times map."""
+        if not lap_times:
+            return None
+
+        # Parse each lap time once, then take the minimum
+        parsed = [(d_num, _lap_to_sec(t_str)) for d_num, t_str in lap_times.items()]
+        parsed = [p for p in parsed if p[1] < 99999.0]
+        if not parsed:
+            return None
+
+        fastest_lap_driver_num, _ = min(parsed, key=lambda p: p[1])
+        if fastest_lap_driver_num:
+            return {
+                "driver_number": fastest_lap_driver_num,
+                "lap_time": lap_times[fastest_lap_driver_num],
+            }
+        return None
 
+    async def get_fastest_lap(self, session_key: int) -> Optional[Dict]:
+        """Determines the current fastest lap based on lap times."""
+        try:
+            lap_times = await self.get_lap_times(session_key)
+            return self.fastest_lap_from_times(lap_times)
         except Exception as e:
             logger.error(f"Error fetching fastest lap: {e}")
         return None
@@ -372,7 +763,7 @@ class F1LiveDashboard:
 
         lines = [
             f"📍 <b>{race_name} ({circuit_name})</b>",
-            "🏎️ <b>F1 Live Dashboard</b>",
+            DASHBOARD_TITLE,
             f"🏁 {session_name}",
         ]
 
@@ -383,13 +774,7 @@ class F1LiveDashboard:
         if session_results:
             for result in session_results:
                 driver_num = result.get("driver_number")
-                status = result.get("status", "")
-                if (
-                    driver_num
-                    and status
-                    and "dnf" in status.lower()
-                    or "retired" in status.lower()
-                ):
+                if driver_num and _DNF_STATUS_RE.search(result.get("status") or ""):
                     driver_status[driver_num] = "DNF"
 
         fastest_lap_driver_num = None
@@ -397,18 +782,17 @@ class F1LiveDashboard:
             driver_number = fastest_lap_data.get("driver_number")
             if driver_number is not None:
                 fastest_lap_driver_num = driver_number
-                fl_abbr = f"DR{driver_number}"
-                if driver_number in driver_abbr:
-                    fl_abbr = driver_abbr[driver_number]
+                fl_abbr = driver_abbr.get(driver_number) or f"DR{driver_number}"
                 fl_time = fastest_lap_data.get("lap_time", "---")
                 lines.append(f"🟣 <b>Fastest Lap:</b> {fl_abbr} ({fl_time})")
 
-        lines.append("━━━━━━━━━━━━━━━━━━━━")
+        lines.append(DIVIDER)
         # Determine current lap from positions if available
-        current_lap = None
+        # get_live_timing only returns dicts, so no per-element type check is
+        # needed; None without positions, while 0 still renders as "Lap 0"
         try:
-            laps_found = (
-                [
+            current_lap = max(
+                (
                     int(
                         p.get("lap")
                         or p.get("laps")
@@ -417,14 +801,10 @@ class F1LiveDashboard:
                         or 0
                     )
                     for p in positions
-                    if isinstance(p, dict)
-                ]
-                if positions
-                else []
+                ),
+                default=None,
             )
-            if laps_found:
-                current_lap = max(laps_found)
-        except Exception:
+        except (TypeError, ValueError):
             current_lap = None
 
         total_laps = None
@@ -434,7 +814,7 @@ class F1LiveDashboard:
                 if v:
                     total_laps = int(v)
                     break
-            except Exception:
+            except (TypeError, ValueError):
                 continue
 
         if current_lap is not None:
@@ -449,6 +829,11 @@ class F1LiveDashboard:
             )
             return "\n".join(lines)
 
+        # Loop invariants
+        is_live_flag = self.is_session_live(session_info)
+        abbr_get = driver_abbr.get
+        tyre_get = TYRE_COMPOUNDS.get
+
         for pos_data in positions:
             driver_num = pos_data.get("driver_number")
             if driver_num is None:
@@ -458,9 +843,7 @@ class F1LiveDashboard:
             if position is None:
                 position = "?"
 
-            driver_abbr_code = f"DR{driver_num}"
-            if driver_num in driver_abbr:
-                driver_abbr_code = driver_abbr[driver_num]
+            driver_abbr_code = abbr_get(driver_num) or f"DR{driver_num}"
 
             # Add DNF status if applicable
             dnf_status = " (DNF)" if driver_num in driver_status else ""
@@ -468,35 +851,19 @@ class F1LiveDashboard:
 
             try:
                 pos_num = int(position) if isinstance(position, (int, str)) else 0
-                is_live_flag = self.is_session_live(session_info)
-                if not is_live_flag:
-                    pos_emoji = (
-                        "🥇"
-                        if pos_num == 1
-                        else (
-                            "🥈" if pos_num == 2 else ("🥉" if pos_num == 3 else "  ")
-                        )
-                    )
-                else:
-                    pos_emoji = "  "
             except (ValueError, TypeError):
+                pos_num = 0
+            if not is_live_flag and 1 <= pos_num <= 3:
+                pos_emoji = PODIUM_EMOJIS[pos_num]
+            else:
                 pos_emoji = "  "
 
-            gap = "+?.???"
-            if intervals and driver_num in intervals:
-                gap = intervals[driver_num]
-                if isinstance(gap, (int, float)):
-                    gap = f"+{float(gap):.3f}"
-                elif "LAP" in str(gap).upper():
-                    gap = str(gap)
-            elif pos_num > 1:
-                gap = f"+{pos_num * 0.5:.3f}"
-
-            lap_time = "-:--.---"
-            if driver_num in lap_times:
-                lap_time = lap_times[driver_num]
-                if isinstance(lap_time, str) and len(lap_time) > 10:
-                    lap_time = lap_time[:10]
+            gap = intervals.get(driver_num) if intervals else None
+            gap = GAP_UNKNOWN if gap is None else _format_gap(gap)
+
+            lap_time = lap_times.get(driver_num, "-:--.---")
+            if isinstance(lap_time, str) and len(lap_time) > 10:
+                lap_time = lap_time[:10]
 
             try:
                 driver_lap = (
@@ -509,13 +876,10 @@ class F1LiveDashboard:
                     driver_lap_str = ""
                 else:
                     driver_lap_str = f" | L:{int(driver_lap)}"
-            except Exception:
+            except (TypeError, ValueError):
                 driver_lap_str = ""
 
-            compound = "UNKNOWN"
-            if driver_num in tyres:
-                compound = tyres[driver_num]
-            tyre_text = TYRE_COMPOUNDS.get(compound, "⚫ Unknown")
+            tyre_text = tyre_get(tyres.get(driver_num, "UNKNOWN"), "⚫ Unknown")
 
             fl_indicator = "🟣" if driver_num == fastest_lap_driver_num else "  "
 
@@ -524,49 +888,134 @@ class F1LiveDashboard:
             line = f"{prefix}{pos_emoji} <b>P{position:02}</b> {fl_indicator} {driver_abbr_code} | {gap} | {lap_time}{driver_lap_str} | {tyre_text}"
             lines.append(line)
 
-        lines.append("━━━━━━━━━━━━━━━━━━━━")
-        baku_tz = timezone(BAKU_TIME_OFFSET)
-        lines.append(
-            f"🔄 <i>Updated: {datetime.now(baku_tz).strftime('%H:%M:%S Baku Time')}</i>"
-        )
+        lines.append(DIVIDER)
+        now = datetime.now(BAKU_TZ)
+        updated = f"{now.hour:02d}:{now.minute:02d}:{now.second:02d}"
+        lines.append(f"🔄 <i>Updated: {updated} Baku Time</i>")
 
         return "\n".join(lines)
 
     def format_race_control(self, messages: List[Dict]) -> str:
         """Format the Race Control messages."""
         if not messages:
-            return "⚠️ <b>Race Control</b>\n━━━━━━━━━━━━━━━━\n<i>No recent messages</i>"
+            return RACE_CONTROL_EMPTY
 
-        lines = ["⚠️ <b>Race Control Messages</b>", "━━━━━━━━━━━━━━━━━━━━"]
+        lines = [RACE_CONTROL_HEADER, DIVIDER]
 
         for msg in messages[:5]:
-            category = msg.get("category", "Info")
-            message = msg.get("message", "")
-            flag = msg.get("flag", "")
-
-            flag_emoji = ""
-            if "YELLOW" in flag.upper():
-                flag_emoji = "🟨"
-            elif "RED" in flag.upper():
-                flag_emoji = "🟥"
-            elif "GREEN" in flag.upper():
-                flag_emoji = "🟩"
-            elif "CHEQUERED" in flag.upper() or "CHECKERED" in flag.upper():
-                flag_emoji = "🏁"
-
-            time_str = (
-                msg.get("date", "")[:19].replace("T", " ") if msg.get("date") else ""
+            lines.append(
+                _format_rc_entry(
+                    msg.get("category", "Info"),
+                    msg.get("message", ""),
+                    msg.get("flag") or "",
+                    msg.get("date") or "",
+                )
             )
 
-            lines.append(f"{flag_emoji} <b>{category}</b>: {message}")
-            if time_str:
-                lines.append(f"   <i>{time_str} UTC</i>")
-
         return "\n".join(lines)
 
     # ... (other methods like get_next_race_meeting, get_last_race_results_summary, format_session_summary, get_latest_session, etc. remain the same)
 
 
+def _dashboard_body(text: str) -> str:
+    """Dashboard text without its trailing "Updated: ..." footer line."""
+    return text.rpartition("\n")[0]
+
+
+async def send_paced(
+    context: ContextTypes.DEFAULT_TYPE, chat_id: int, text: str, **kwargs
+):
+    """Send a message within Telegram's rate limits, retrying once on RetryAfter."""
+    bucket = dashboard.rate_buckets.get(chat_id)
+    if bucket is None:
+        bucket = dashboard.rate_buckets[chat_id] = TokenBucket(TELEGRAM_CHAT_RATE)
+    await bucket.acquire()
+    async with dashboard.telegram_semaphore:
+        try:
+            return await context.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+        except RetryAfter as e:
+            logger.warning(f"Rate limited sending to chat {chat_id}: {e}")
+            await asyncio.sleep(e.retry_after)
+            return await context.bot.send_message(chat_id=chat_id, text=text, **kwargs)
+
+
+def _batch_messages(
+    texts: List[str], limit: int = COMMENTARY_BATCH_LIMIT
+) -> List[str]:
+    """Join texts into as few messages as possible, each at most limit characters.
+
+    A single text longer than limit is split into limit-sized pieces, since
+    Telegram would reject it whole.
+    """
+    batches: List[str] = []
+    current: List[str] = []
+    size = 0
+    for text in texts:
+        pieces = [text[i : i + limit] for i in range(0, len(text), limit)] or [text]
+        for piece in pieces:
+            added = len(piece) + (2 if current else 0)
+            if current and size + added > limit:
+                batches.append("\n\n".join(current))
+                current, size = [], 0
+                added = len(piece)
+            current.append(piece)
+            size += added
+    if current:
+        batches.append("\n\n".join(current))
+    return batches
+
+
+async def send_batched(
+    context: ContextTypes.DEFAULT_TYPE, chat_id: int, texts: List[str]
+) -> None:
+    """Send notification texts as a few combined, paced HTML messages.
+
+    Batches go out one after another so they arrive in order (the per-chat
+    token bucket serializes them anyway); a failed batch is logged and skipped.
+    """
+    for text in _batch_messages(texts):
+        try:
+            await send_paced(context, chat_id, text, parse_mode=ParseMode.HTML)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Send failed for chat {chat_id}: {e}")
+
+
+def _fmt_retirement(
+    ev: Dict, ev_type: str, ev_text: str, code_for_num: Callable[[Any], str]
+) -> str:
+    """Format a DNF/retirement event."""
+    dn = ev.get("driver_number") or ev.get("driver")
+    code = None
+    if isinstance(dn, (int, str)):
+        code = code_for_num(dn)
+    if not code:
+        m = _DRNUM_RE.search(ev_text)
+        if m:
+            code = code_for_num(int(m.group(1)))
+    if code:
+        return f"❌ <b>Retirement</b>\n{code} — {ev_text}"
+    return f"❌ <b>Retirement</b>\n{ev_text}"
+
+
+def _fmt_event(
+    ev: Dict, ev_type: str, ev_text: str, code_for_num: Callable[[Any], str]
+) -> str:
+    """Format any other event, replacing DR<n> placeholders with driver codes."""
+    ev_text = _DR_CODE_RE.sub(lambda m: code_for_num(int(m.group(1))), ev_text)
+    return f"ℹ️ <b>{ev_type or 'Event'}</b>\n{ev_text}"
+
+
+# Commentary formatters keyed on the lowercased event type. Overtake and pit
+# formatting (same logic as before) is omitted here.
+_EVENT_FORMATTERS: Dict[str, Callable[..., str]] = {
+    "dnf": _fmt_retirement,
+    "retirement": _fmt_retirement,
+    "retired": _fmt_retirement,
+}
+
+
 async def commentary_loop(
     context: ContextTypes.DEFAULT_TYPE, chat_id: int, session_key: int
 ):
@@ -574,158 +1023,112 @@ async def commentary_loop(
     try:
         await dashboard.get_live_driver_lineup()
 
-        dashboard.commentary_seen.setdefault(chat_id, set())
+        dashboard.start_commentary(chat_id, session_key)
         seen_dnfs = set()  # Track seen DNF drivers
 
         while True:
             try:
-                rc_msgs = await dashboard.get_race_control(session_key)
-                events = await dashboard.get_session_events(session_key)
-                session_results = await dashboard.get_session_result(
-                    session_key
-                )  # New: fetch results for DNF
+                abbr = dashboard.dynamic_driver_abbr
+
+                def code_for_num(n: int) -> str:
+                    try:
+                        num = int(n)
+                    except (ValueError, TypeError):
+                        return str(n)
+                    return abbr.get(num) or f"DR{num}"
+
+                fetched = await asyncio.gather(
+                    dashboard.get_race_control(session_key),
+                    dashboard.get_session_events(session_key),
+                    dashboard.get_session_result(session_key),  # For DNF
+                    return_exceptions=True,
+                )
+                for r in fetched:
+                    if isinstance(r, Exception):
+                        logger.error(f"Commentary fetch failed for chat {chat_id}: {r}")
+                rc_msgs, events, session_results = (
+                    [] if isinstance(r, Exception) else r for r in fetched
+                )
+                # Grow the LRU with the feed so it never evicts items this poll
+                # returns (they would be re-sent on every poll)
+                cap = max(
+                    COMMENTARY_SEEN_MAX,
+                    len(rc_msgs) + len(events) + len(session_results),
+                )
+                outgoing: List[str] = []
+
+                # Items are marked seen before the batch is sent, so a malformed
+                # item is skipped on its own instead of failing the whole poll
 
                 # Process race control messages
                 for msg in reversed(rc_msgs):
-                    key = json.dumps(msg, sort_keys=True)
-                    if key in dashboard.commentary_seen[chat_id]:
-                        continue
-                    dashboard.commentary_seen[chat_id].add(key)
-
-                    title = msg.get("title") or msg.get("type") or "Race Control"
-                    body = (
-                        msg.get("message")
-                        or msg.get("description")
-                        or msg.get("text")
-                        or str(msg)
-                    )
-                    text = f"⚠️ <b>{title}</b>\n{body}"
-                    await context.bot.send_message(
-                        chat_id=chat_id, text=text, parse_mode=ParseMode.HTML
-                    )
+                    try:
+                        key = _rc_key(msg)
+                        if not dashboard.mark_commentary_seen(chat_id, key, cap):
+                            continue
+
+                        title = msg.get("title") or msg.get("type") or "Race Control"
+                        body = (
+                            msg.get("message")
+                            or msg.get("description")
+                            or msg.get("text")
+                            or str(msg)
+                        )
+                        outgoing.append(f"⚠️ <b>{title}</b>\n{body}")
+                    except Exception as e:
+                        logger.warning(f"Skipping race control item {msg!r}: {e}")
 
                 # Process other events (overtakes, pit stops, etc.)
                 for ev in events:
-                    key = json.dumps(ev, sort_keys=True)
-                    if key in dashboard.commentary_seen[chat_id]:
-                        continue
-                    dashboard.commentary_seen[chat_id].add(key)
-
-                    ev_type = (ev.get("type") or ev.get("event") or "").strip()
-                    ev_text = (
-                        ev.get("description")
-                        or ev.get("short_text")
-                        or ev.get("message")
-                        or str(ev)
-                    ).strip()
-
-                    def code_for_num(n: int) -> str:
-                        try:
-                            num = int(n)
-                            return dashboard.dynamic_driver_abbr.get(num, f"DR{num}")
-                        except (ValueError, TypeError):
-                            return str(n)
-                        except Exception:
-                            return f"DR{n}"
-
-                    def find_lap(text: str, ev: Dict) -> Optional[int]:
-                        for k in ("lap", "lap_number", "laps", "current_lap"):
-                            v = ev.get(k)
-                            if isinstance(v, (int, str)):
-                                try:
-                                    return int(v)
-                                except Exception:
-                                    continue
-                        m = re.search(
-                            r"lap(?:s)?\s*(?:#?:)?\s*(\d{1,3})",
-                            text,
-                            flags=re.IGNORECASE,
-                        )
-                        if m:
-                            try:
-                                return int(m.group(1))
-                            except Exception:
-                                return None
-                        m2 = re.search(r"on lap\s*(\d{1,3})", text, flags=re.IGNORECASE)
-                        if m2:
-                            try:
-                                return int(m2.group(1))
-                            except Exception:
-                                return None
-                        return None
-
-                    formatted = None
-
-                    # Detect overtakes, pits, etc. (same as before)
-                    if "overtake" in ev_type.lower() or "overtook" in ev_text.lower():
-                        # ... (same logic as before)
-                        pass  # Omitted for brevity
-
-                    if not formatted and (
-                        "pit" in ev_type.lower() or "pit" in ev_text.lower()
-                    ):
-                        # ... (same pit logic)
-                        pass  # Omitted
-
-                    # New: Detect DNF from events or session_result
-                    if not formatted and (
-                        "dnf" in ev_type.lower()
-                        or "retir" in ev_type.lower()
-                        or "retire" in ev_text.lower()
-                    ):
-                        dn = ev.get("driver_number") or ev.get("driver")
-                        code = None
-                        try:
-                            if isinstance(dn, (int, str)):
-                                code = code_for_num(dn)
-                        except Exception:
-                            code = None
-                        if not code:
-                            m = re.search(r"DR?(\d{1,2})", ev_text)
-                            if m:
-                                code = code_for_num(int(m.group(1)))
-                        reason = ev_text
-                        if code:
-                            formatted = f"❌ <b>Retirement</b>\n{code} — {reason}"
-                        else:
-                            formatted = f"❌ <b>Retirement</b>\n{reason}"
-
-                    if not formatted:
-                        try:
-                            ev_text = re.sub(
-                                r"DR(\d{1,2})",
-                                lambda m: code_for_num(int(m.group(1))),
-                                ev_text,
-                            )
-                        except Exception:
-                            pass
-                        formatted = f"ℹ️ <b>{ev_type or 'Event'}</b>\n{ev_text}"
+                    try:
+                        key = _event_key(ev)
+                        if not dashboard.mark_commentary_seen(chat_id, key, cap):
+                            continue
 
-                    await context.bot.send_message(
-                        chat_id=chat_id, text=formatted, parse_mode=ParseMode.HTML
-                    )
+                        ev_type = (ev.get("type") or ev.get("event") or "").strip()
+                        ev_text = (
+                            ev.get("description")
+                            or ev.get("short_text")
+                            or ev.get("message")
+                            or str(ev)
+                        ).strip()
+                        et = ev_type.lower()
+                        xt = ev_text.lower()
+
+                        # Exact event types dispatch directly; otherwise fall back
+                        # to keyword matching on the type/text
+                        fmt = _EVENT_FORMATTERS.get(et)
+                        if fmt is None and (
+                            "dnf" in et or "retir" in et or "retir" in xt
+                        ):
+                            fmt = _fmt_retirement
+                        outgoing.append(
+                            (fmt or _fmt_event)(ev, ev_type, ev_text, code_for_num)
+                        )
+                    except Exception as e:
+                        logger.warning(f"Skipping session event {ev!r}: {e}")
 
                 # New: Process DNF from session_result
                 for result in session_results:
-                    driver_num = result.get("driver_number")
-                    status = result.get("status", "").lower()
-                    if (
-                        driver_num
-                        and ("dnf" in status or "retired" in status)
-                        and driver_num not in seen_dnfs
-                    ):
-                        code = code_for_num(driver_num)
-                        dnf_key = f"dnf_{driver_num}"
-                        if dnf_key not in dashboard.commentary_seen[chat_id]:
-                            dashboard.commentary_seen[chat_id].add(dnf_key)
-                            seen_dnfs.add(driver_num)
-                            reason = result.get("status_detail", "Retirement")
-                            dnf_text = f"❌ <b>DNF</b>\n{code} retired — {reason}"
-                            await context.bot.send_message(
-                                chat_id=chat_id,
-                                text=dnf_text,
-                                parse_mode=ParseMode.HTML,
-                            )
+                    try:
+                        driver_num = result.get("driver_number")
+                        if (
+                            driver_num
+                            and driver_num not in seen_dnfs
+                            and _DNF_STATUS_RE.search(result.get("status") or "")
+                        ):
+                            code = code_for_num(driver_num)
+                            dnf_key = f"dnf_{driver_num}"
+                            if dashboard.mark_commentary_seen(chat_id, dnf_key, cap):
+                                seen_dnfs.add(driver_num)
+                                reason = result.get("status_detail", "Retirement")
+                                outgoing.append(
+                                    f"❌ <b>DNF</b>\n{code} retired — {reason}"
+                                )
+                    except Exception as e:
+                        logger.warning(f"Skipping session result {result!r}: {e}")
+
+                await send_batched(context, chat_id, outgoing)
 
                 await asyncio.sleep(10)
             except asyncio.CancelledError:
@@ -743,21 +1146,37 @@ async def update_dashboard_loop(
     """Background task to update the dashboard with DNF status."""
     try:
         await asyncio.sleep(3)
+        last_body = None
+        backoff = UPDATE_BACKOFF_MIN
 
         while True:
             try:
-                session_info = await dashboard.get_latest_session()
+                # Independent OpenF1 requests, issued concurrently
+                (
+                    session_info,
+                    positions,
+                    (lap_times, tyres, intervals),
+                    session_results,
+                ) = await asyncio.gather(
+                    dashboard.get_latest_session(),
+                    dashboard.get_live_timing(session_key),
+                    dashboard.get_live_bundle(session_key),
+                    dashboard.get_session_result(session_key),
+                )
+                # No session info is a failed fetch, not a finished session
+                if session_info is None:
+                    logger.warning(f"No session info for chat {chat_id}, retrying")
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, UPDATE_BACKOFF_MAX)
+                    continue
+                # Lets the OpenF1 getters pick live/idle TTLs for this session
+                dashboard.session_info_cache = session_info
                 if not dashboard.is_session_live(session_info):
                     raise asyncio.CancelledError(
                         "Session finished, stopping live updates."
                     )
 
-                positions = await dashboard.get_live_timing(session_key)
-                lap_times = await dashboard.get_lap_times(session_key)
-                tyres = await dashboard.get_stints(session_key)
-                intervals = await dashboard.get_intervals(session_key)
-                fastest_lap_data = await dashboard.get_fastest_lap(session_key)
-                session_results = await dashboard.get_session_result(session_key)  # New
+                fastest_lap_data = dashboard.fastest_lap_from_times(lap_times)
                 favorite = dashboard.user_favorites.get(chat_id)
 
                 if session_info:
@@ -772,38 +1191,31 @@ async def update_dashboard_loop(
                         session_results,
                     )
 
-                    keyboard = [
-                        [
-                            InlineKeyboardButton(
-                                "⏹️ Stop Updates", callback_data="stop"
-                            ),
-                            InlineKeyboardButton(
-                                "💬 Commentary", callback_data="commentary"
-                            ),
-                        ],
-                        [
-                            InlineKeyboardButton(
-                                "🗓️ Weekend Schedule", callback_data="schedule"
+                    # Only the footer timestamp changed: skip the edit
+                    body = _dashboard_body(text)
+                    if body != last_body:
+                        async with dashboard.telegram_semaphore:
+                            await context.bot.edit_message_text(
+                                chat_id=chat_id,
+                                message_id=message_id,
+                                text=text,
+                                reply_markup=LIVE_KEYBOARD,
+                                parse_mode=ParseMode.HTML,
                             )
-                        ],
-                    ]
-                    reply_markup = InlineKeyboardMarkup(keyboard)
-
-                    await context.bot.edit_message_text(
-                        chat_id=chat_id,
-                        message_id=message_id,
-                        text=text,
-                        reply_markup=reply_markup,
-                        parse_mode=ParseMode.HTML,
-                    )
+                        last_body = body
 
+                backoff = UPDATE_BACKOFF_MIN
                 await asyncio.sleep(15)
 
             except asyncio.CancelledError:
                 raise
+            except RetryAfter as e:
+                logger.warning(f"Rate limited updating chat {chat_id}: {e}")
+                await asyncio.sleep(e.retry_after)
             except Exception as e:
                 logger.error(f"Error in update loop: {e}")
-                await asyncio.sleep(30)
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, UPDATE_BACKOFF_MAX)
 
     except asyncio.CancelledError:
         logger.info(f"Update task cancelled for chat {chat_id}")
@@ -819,137 +1231,125 @@ async def update_dashboard_loop(
 # ... (rest of the code remains the same: live_command, stop_command, simulate_live_loop with DNF from FastF1 if needed, etc.)
 
 
+# Loaded FastF1 sessions for the demo replay, keyed by (year, gp, session_type).
+# Historical data never changes, so each session is downloaded and parsed once.
+_SIM_SESSION_CACHE: Dict[Tuple[int, str, str], Any] = {}
+
+
+async def _load_sim_session(year: int, gp: str, session_type: str):
+    """Return a loaded FastF1 session, loading it in a worker thread on first use."""
+    key = (year, gp, session_type)
+    session = _SIM_SESSION_CACHE.get(key)
+    if session is None:
+        session = await asyncio.to_thread(fastf1.get_session, year, gp, session_type)
+        # The replay only reads laps and results; skip telemetry/weather so the
+        # cached session does not pin car data for the life of the process
+        await asyncio.to_thread(session.load, laps=True, telemetry=False, weather=False)
+        _SIM_SESSION_CACHE[key] = session
+    return session
+
+
 # For simulation, add DNF detection from FastF1
 async def simulate_live_loop(
     context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id: int
 ):
     """Simulated live loop using FastF1 historical data for demo/testing, with DNF."""
     await dashboard.get_live_driver_lineup()
+    abbr = dashboard.dynamic_driver_abbr  # Not refreshed during the replay
+
+    def code(n: int) -> str:
+        return abbr.get(n) or f"DR{n}"
 
     try:
         year = 2025
         gp = "Mexico"
         session_type = "R"
-        session = await asyncio.get_event_loop().run_in_executor(
-            None, lambda: fastf1.get_session(year, gp, session_type)
-        )
-        await asyncio.get_event_loop().run_in_executor(
-            None, lambda: session.load(telemetry=True, laps=True, weather=True)
-        )
+        session = await _load_sim_session(year, gp, session_type)
 
         laps = session.laps
         max_laps = int(laps["LapNumber"].max())
 
-        def format_lap_time(lap_time):
-            if pd.isna(lap_time):
-                return "1:31.000"
-            seconds = lap_time.total_seconds()
-            minutes = int(seconds // 60)
-            seconds = seconds % 60
-            return f"{minutes}:{seconds:06.3f}"
-
-        # Get full results for DNF
+        # Get full results for DNF; they do not change during the replay
         results = session.results
-        dnf_drivers = set(results[results["Status"] == "DNF"]["DriverNumber"].tolist())
+        dnf_numbers = (
+            pd.to_numeric(
+                results.loc[results["Status"] == "DNF", "DriverNumber"],
+                errors="coerce",
+            )
+            .dropna()
+            .astype(int)
+            .tolist()
+        )
+        dnf_drivers = set(dnf_numbers)
+        session_results_sim = [
+            {"driver_number": driver_num, "status": "DNF"} for driver_num in dnf_numbers
+        ]
 
         previous_positions = {}
-
+        last_body = None
+        unannounced_dnfs = set(dnf_drivers)
+
+        # Split the laps frame once, pre-sorted, instead of masking it every lap
+        laps_by_lap = {}
+        for lap_number, group in laps.groupby("LapNumber", sort=True):
+            group = group.sort_values("Position")
+            if group["Position"].isnull().all():
+                group = group.sort_values("LapTime")
+            laps_by_lap[int(lap_number)] = group
+
+        # Laps run on a fixed schedule, so Telegram latency is absorbed by the
+        # wait instead of stretching every lap
+        start = time.monotonic()
         for lap in range(1, max_laps + 1):
-            current_laps = laps[laps["LapNumber"] == lap]
-            if current_laps.empty:
+            current_laps = laps_by_lap.get(lap)
+            if current_laps is None or current_laps.empty:
                 continue
 
-            current_laps = current_laps.sort_values("Position")
-            if current_laps["Position"].isnull().all():
-                current_laps = current_laps.sort_values("LapTime")
-
-            positions = []
-            current_pos_dict = {}
-            for idx, row in current_laps.iterrows():
-                driver_num = (
-                    int(row["DriverNumber"])
-                    if pd.notnull(row["DriverNumber"])
-                    else idx + 1
-                )
-                position = (
-                    int(row["Position"]) if pd.notnull(row["Position"]) else idx + 1
-                )
-                positions.append({"driver_number": driver_num, "position": position})
-                current_pos_dict[driver_num] = position
+            # Column-wise projections instead of walking rows with iterrows()
+            fallback = pd.Series(current_laps.index + 1, index=current_laps.index)
+            driver_nums = (
+                pd.to_numeric(current_laps["DriverNumber"], errors="coerce")
+                .fillna(fallback)
+                .astype(int)
+                .tolist()
+            )
+            position_list = (
+                current_laps["Position"].fillna(fallback).astype(int).tolist()
+            )
+            positions = [
+                {"driver_number": driver_num, "position": position}
+                for driver_num, position in zip(driver_nums, position_list)
+            ]
+            current_pos_dict = dict(zip(driver_nums, position_list))
 
-            # Detect overtakes (same as before)
+            # Detect overtakes: whoever now holds a driver's old position was passed
+            pos_to_driver = {pos: num for num, pos in current_pos_dict.items()}
+            outgoing: List[str] = []
             for driver_num, pos in current_pos_dict.items():
-                if driver_num in previous_positions:
-                    prev_pos = previous_positions[driver_num]
-                    if pos < prev_pos:
-                        for other_num, other_pos in current_pos_dict.items():
-                            if other_pos == prev_pos and other_num != driver_num:
-                                a_code = dashboard.dynamic_driver_abbr.get(
-                                    driver_num, f"DR{driver_num}"
-                                )
-                                b_code = dashboard.dynamic_driver_abbr.get(
-                                    other_num, f"DR{other_num}"
-                                )
-                                overtake_text = f"🔁 <b>Overtake (L{lap})</b>\n{a_code} overtook {b_code}"
-                                await context.bot.send_message(
-                                    chat_id=chat_id,
-                                    text=overtake_text,
-                                    parse_mode=ParseMode.HTML,
-                                )
-                                break
+                prev_pos = previous_positions.get(driver_num)
+                if prev_pos is None or pos >= prev_pos:
+                    continue
+                other_num = pos_to_driver.get(prev_pos)
+                if other_num is None or other_num == driver_num:
+                    continue
+                outgoing.append(
+                    f"🔁 <b>Overtake (L{lap})</b>\n"
+                    f"{code(driver_num)} overtook {code(other_num)}"
+                )
 
             previous_positions = current_pos_dict
 
-            lap_times = {}
-            for idx, row in current_laps.iterrows():
-                driver_num = (
-                    int(row["DriverNumber"])
-                    if pd.notnull(row["DriverNumber"])
-                    else idx + 1
-                )
-                lap_time = row["LapTime"]
-                lap_times[driver_num] = format_lap_time(lap_time)
-
-            tyres = {}
-            for idx, row in current_laps.iterrows():
-                driver_num = (
-                    int(row["DriverNumber"])
-                    if pd.notnull(row["DriverNumber"])
-                    else idx + 1
-                )
-                compound = row.get("Compound", "UNKNOWN").upper()
-                tyres[driver_num] = compound
+            lap_time_col = current_laps["LapTime"]
+            lap_times = dict(zip(driver_nums, _format_lap_times(lap_time_col)))
 
-            leader_lap = (
-                current_laps.iloc[0]["LapTime"]
-                if not current_laps.empty
-                else pd.Timedelta(0)
-            )
+            if "Compound" in current_laps:
+                compounds = current_laps["Compound"].fillna("UNKNOWN").astype(str)
+                tyres = dict(zip(driver_nums, compounds.str.upper()))
+            else:
+                tyres = dict.fromkeys(driver_nums, "UNKNOWN")
 
-            intervals = {}
-            for idx, row in current_laps.iterrows():
-                driver_num = (
-                    int(row["DriverNumber"])
-                    if pd.notnull(row["DriverNumber"])
-                    else idx + 1
-                )
-                lap_time = row["LapTime"]
-                gap_sec = (
-                    (lap_time - leader_lap).total_seconds()
-                    if pd.notnull(lap_time)
-                    else 0.0
-                )
-                intervals[driver_num] = f"{gap_sec:.3f}"
-
-            # Session results for DNF in simulation
-            session_results_sim = []
-            for _, result in results.iterrows():
-                driver_num = result["DriverNumber"]
-                status = result["Status"]
-                if status == "DNF":
-                    session_results_sim.append(
-                        {"driver_number": driver_num, "status": status}
-                    )
+            gaps = (lap_time_col - lap_time_col.iloc[0]).dt.total_seconds().fillna(0.0)
+            intervals = dict(zip(driver_nums, (f"{g:.3f}" for g in gaps)))
 
             session_info = {
                 "meeting_name": "Demo Replay - Mexico 2025",
@@ -968,33 +1368,39 @@ async def simulate_live_loop(
                 session_results_sim,
             )
 
-            kb = [
-                [
-                    InlineKeyboardButton("⏹️ Stop Updates", callback_data="stop"),
-                    InlineKeyboardButton("💬 Commentary", callback_data="commentary"),
-                ],
-            ]
-            reply_markup = InlineKeyboardMarkup(kb)
-
-            await context.bot.edit_message_text(
-                chat_id=chat_id,
-                message_id=message_id,
-                text=text,
-                reply_markup=reply_markup,
-                parse_mode=ParseMode.HTML,
-            )
-
-            # Send DNF message if driver DNFs this lap (simple: if not in previous laps)
-            for driver_num in dnf_drivers:
-                if driver_num in current_pos_dict:
-                    continue  # Still running
-                # Assume DNF message if first time missing
-                dnf_text = f"❌ <b>DNF</b>\n{dashboard.dynamic_driver_abbr.get(driver_num, f'DR{driver_num}')} retired"
-                await context.bot.send_message(
-                    chat_id=chat_id, text=dnf_text, parse_mode=ParseMode.HTML
-                )
-
-            await asyncio.sleep(2)
+            body = _dashboard_body(text)
+            if body != last_body:
+                try:
+                    async with dashboard.telegram_semaphore:
+                        await context.bot.edit_message_text(
+                            chat_id=chat_id,
+                            message_id=message_id,
+                            text=text,
+                            reply_markup=SIM_KEYBOARD,
+                            parse_mode=ParseMode.HTML,
+                        )
+                    last_body = body
+                except RetryAfter as e:
+                    # Skip this lap's edit; the next lap renders fresh data anyway
+                    logger.warning(f"Rate limited updating replay for {chat_id}: {e}")
+                    await asyncio.sleep(e.retry_after)
+
+            # Announce each DNF once, on the first lap the driver is missing
+            retired = [d for d in unannounced_dnfs if d not in current_pos_dict]
+            for driver_num in retired:
+                unannounced_dnfs.discard(driver_num)
+                outgoing.append(f"❌ <b>DNF</b>\n{code(driver_num)} retired")
+
+            await send_batched(context, chat_id, outgoing)
+
+            deadline = start + lap * SIM_LAP_INTERVAL
+            now = time.monotonic()
+            if deadline < now:
+                # Behind schedule (slow edit, rate limit): re-anchor the schedule
+                # instead of firing the overdue laps back to back
+                start = now - lap * SIM_LAP_INTERVAL
+            else:
+                await asyncio.sleep(deadline - now)
 
     except asyncio.CancelledError:
         logger.info(f"Simulation loop cancelled for chat {chat_id}")
@@ -1,11 +1,14 @@
 from __future__ import annotations
 
+import logging
 from typing import Optional, Union
 
 from telegram import Update, Message, InlineKeyboardMarkup
 from telegram.error import BadRequest
 from telegram.ext import ContextTypes
 
+logger = logging.getLogger(__name__)
+
 
 def get_chat_id(update: Update) -> Optional[int]:
     """Safely get the chat_id from an update object."""
@@ -39,10 +42,10 @@ async def safe_reply(
         else:
             return await message.reply_text(text=text, reply_markup=reply_markup, **kwargs)
     except BadRequest as e:
-        if "Message is not modified" in str(e):
+        # e.message is PTB's normalized error text ("Bad Request: " prefix removed,
+        # capitalized), e.g. "Message is not modified: ..."
+        if e.message.startswith("Message is not modified"):
             # Ignore errors where the message content is the same
-            pass
-        else:
-            # For other errors, you might want to log them
-            print(f"Error sending message: {e}")
-            return None
\ No newline at end of file
+            return None
+        logger.error(f"Error sending message: {e.message}")
+        return None
\ No newline at end of file